@@ -1,7 +1,7 @@
-import json
 import os
 from pathlib import Path
 
+import orjson
 from dotenv import load_dotenv
 from neo4j import GraphDatabase
 
@@ -21,6 +21,21 @@ AUTH = ("neo4j", os.getenv("NEO4J_PASSWORD"))
 
 
 PRODUCTS_JSON_PATH = BASE_DIR / "products.json"
+BATCH_SIZE = 1000
+
+UPSERT_PRODUCTS_QUERY = """
+UNWIND $products AS product
+MERGE (p:PRODUCT:BUFFALO {id: product.id})
+SET p.breed = product.breed,
+    p.age = product.age,
+    p.milkYield = product.milkYield,
+    p.price = product.price,
+    p.inStock = product.inStock,
+    p.insurance = product.insurance,
+    p.buffalo_images = product.buffalo_images,
+    p.description = product.description
+RETURN count(p) AS nodes_upserted
+"""
 
 
 def get_driver():
@@ -31,8 +46,7 @@ def load_products(path: Path):
     if not path.exists():
         raise FileNotFoundError(f"products.json not found at: {path}")
 
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+    data = orjson.loads(path.read_bytes())
 
     if not isinstance(data, list):
         raise ValueError("products.json must contain a list of products")
@@ -40,6 +54,11 @@ def load_products(path: Path):
     return data
 
 
+def upsert_batch(tx, batch):
+    record = tx.run(UPSERT_PRODUCTS_QUERY, products=batch).single()
+    return record["nodes_upserted"] if record else 0
+
+
 def main():
     products = load_products(PRODUCTS_JSON_PATH)
 
@@ -54,25 +73,10 @@ def main():
                 """
             )
 
-            result = session.run(
-                """
-                UNWIND $products AS product
-                MERGE (p:PRODUCT:BUFFALO {id: product.id})
-                SET p.breed = product.breed,
-                    p.age = product.age,
-                    p.milkYield = product.milkYield,
-                    p.price = product.price,
-                    p.inStock = product.inStock,
-                    p.insurance = product.insurance,
-                    p.buffalo_images = product.buffalo_images,
-                    p.description = product.description
-                RETURN count(p) AS nodes_upserted
-                """,
-                products=products,
-            )
-
-            record = result.single()
-            upserted = record["nodes_upserted"] if record else 0
+            # One transaction per batch keeps memory and lock hold times bounded
+            upserted = 0
+            for start in range(0, len(products), BATCH_SIZE):
+                upserted += session.execute_write(upsert_batch, products[start:start + BATCH_SIZE])
             print(f"Upserted {upserted} PRODUCT:BUFFALO nodes into Neo4j.")
     finally:
         driver.close()
@@ -1,19 +1,31 @@
+import logging
 import os
-import random
-from typing import Optional, Dict, Any
+import secrets
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse
-from neo4j import GraphDatabase
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response
+from neo4j import AsyncGraphDatabase
+from neo4j.exceptions import ServiceUnavailable
+from pydantic import BaseModel, Field
+from starlette.exceptions import HTTPException as StarletteHTTPException
 import datetime
 from neo4j.time import Date
 
+# Paths are resolved once at import
+BASE_DIR = Path(__file__).resolve().parent
+ENV_PATH = BASE_DIR / ".env"
+STATIC_DIR = BASE_DIR / "static"
+INDEX_PATH = STATIC_DIR / "index.html"
+FAVICON_PATH = STATIC_DIR / "favicon.ico"
+
+logger = logging.getLogger(__name__)
+
 # Load environment variables from backend/.env
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-ENV_PATH = os.path.join(BASE_DIR, ".env")
 load_dotenv(ENV_PATH)
 
 # Validate Neo4j environment variables
@@ -22,7 +34,7 @@ if not os.getenv("NEO4J_URI"):
 if not os.getenv("NEO4J_PASSWORD"):
     raise RuntimeError("NEO4J_PASSWORD is missing. Ensure backend/.env is correctly configured.")
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # CORS
 app.add_middleware(
@@ -33,43 +45,102 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class ProcessTimeMiddleware:
+    """Add an X-Process-Time header (seconds until the response starts) to HTTP responses.
+
+    Written as plain ASGI over scope/receive/send rather than BaseHTTPMiddleware, which builds
+    Request/Response objects and an extra task per request; new middleware should follow this shape.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                elapsed = f"{time.perf_counter() - start:.6f}".encode()
+                message["headers"] = [*message.get("headers", []), (b"x-process-time", elapsed)]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+app.add_middleware(ProcessTimeMiddleware)
+
+
+# Registered on Starlette's base class so routing 404/405s and the static mount share the shape too
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request, exc: StarletteHTTPException):
+    # Errors carry a real HTTP status now; the body keeps the legacy shape existing clients parse
+    return ORJSONResponse(
+        {"statuscode": exc.status_code, "status": "error", "message": exc.detail},
+        status_code=exc.status_code,
+        headers=exc.headers,
+    )
+
+# Static assets only change on deploy; let browsers and CDNs reuse them for a week
+ASSET_CACHE_HEADERS = {"Cache-Control": "public, max-age=604800"}
+# HTML pages link to those assets, so keep them short-lived or a deploy stays invisible for a week
+PAGE_CACHE_HEADERS = {"Cache-Control": "public, max-age=3600"}
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that adds Cache-Control on top of Starlette's ETag/Last-Modified handling.
+
+    HTML gets the same short policy as `/`, so `/static/` and `/static/index.html` never outlive a deploy.
+    """
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers.update(PAGE_CACHE_HEADERS if response.media_type == "text/html" else ASSET_CACHE_HEADERS)
+        return response
+
 # Mount static files for frontend
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-STATIC_DIR = os.path.join(BASE_DIR, "static")
-app.mount("/static", StaticFiles(directory=STATIC_DIR, html=True), name="static")
+app.mount("/static", CachedStaticFiles(directory=STATIC_DIR, html=True), name="static")
+
+# Served when static/index.html is missing; pre-encoded so no request pays for the encode
+FALLBACK_HTML = b"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Markwave Admin Dashboard</title>
+    <style>
+        body { font-family: sans-serif; margin: 2rem; }
+        h1 { color: #333; }
+        a { color: #007bff; text-decoration: none; }
+    </style>
+</head>
+<body>
+    <h1>Markwave Admin Dashboard</h1>
+    <p>FastAPI backend is running.</p>
+    <p><a href="/docs">API Documentation (Swagger UI)</a></p>
+    <p><a href="/health">Health Check</a></p>
+</body>
+</html>
+"""
+
+# The landing page and favicon only change on deploy, so read them once at import
+INDEX_HTML = INDEX_PATH.read_bytes() if INDEX_PATH.exists() else FALLBACK_HTML
+FAVICON = FAVICON_PATH.read_bytes() if FAVICON_PATH.exists() else None
 
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
     """Serve the main frontend page"""
-    index_path = os.path.join("static", "index.html")
-    if os.path.exists(index_path):
-        with open(index_path, "r") as f:
-            return f.read()
-    return """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <title>Markwave Admin Dashboard</title>
-        <style>
-            body { font-family: sans-serif; margin: 2rem; }
-            h1 { color: #333; }
-            a { color: #007bff; text-decoration: none; }
-        </style>
-    </head>
-    <body>
-        <h1>Markwave Admin Dashboard</h1>
-        <p>FastAPI backend is running.</p>
-        <p><a href="/docs">API Documentation (Swagger UI)</a></p>
-        <p><a href="/health">Health Check</a></p>
-    </body>
-    </html>
-    """
+    return HTMLResponse(INDEX_HTML, headers=PAGE_CACHE_HEADERS)
 
-@app.get("/favicon.ico")
+@app.api_route("/favicon.ico", methods=["GET", "HEAD"])
 async def favicon():
     """Return a minimal favicon to avoid 404s"""
-    return FileResponse("static/favicon.ico") if os.path.exists("static/favicon.ico") else {"status": "no favicon"}
+    if FAVICON is not None:
+        return Response(FAVICON, media_type="image/x-icon", headers=ASSET_CACHE_HEADERS)
+    return {"status": "no favicon"}
 
 @app.get("/health")
 async def health_check():
@@ -78,75 +149,154 @@ async def health_check():
 # Neo4j connection
 URI = os.getenv("NEO4J_URI")
 AUTH = ("neo4j", os.getenv("NEO4J_PASSWORD"))
+# Pool sizing is per worker process; tune from observed load rather than code changes
+NEO4J_POOL_SIZE = int(os.getenv("NEO4J_POOL_SIZE", "50"))
+NEO4J_ACQ_TIMEOUT = float(os.getenv("NEO4J_ACQ_TIMEOUT", "10"))
+
+# Uniqueness constraints also create the backing indexes used by the mobile/id lookups;
+# the verified index serves the paginated referral/customer lists
+USER_SCHEMA = (
+    "CREATE CONSTRAINT user_mobile_unique IF NOT EXISTS FOR (u:User) REQUIRE u.mobile IS UNIQUE",
+    "CREATE CONSTRAINT user_id_unique IF NOT EXISTS FOR (u:User) REQUIRE u.id IS UNIQUE",
+    "CREATE INDEX user_verified IF NOT EXISTS FOR (u:User) ON (u.verified)",
+)
+# The lists page on u.id, which skips users without one, and users created by other writers may lack
+# an id; assign the missing ones at startup, in bounded transactions rather than one large write
+BACKFILL_USER_IDS = (
+    "MATCH (u:User) WHERE u.id IS NULL "
+    "CALL { WITH u SET u.id = randomUUID() } IN TRANSACTIONS OF 10000 ROWS"
+)
 
-def build_update_clauses(user_update: UserUpdate) -> tuple[list, dict]:
-    set_clauses = []
-    params = {}
-
-    # Standard fields
-    if user_update.name is not None:
-        set_clauses.append("u.name = $name")
-        params["name"] = user_update.name
-    if user_update.email is not None:
-        set_clauses.append("u.email = $email")
-        params["email"] = user_update.email
-        set_clauses.append("u.verified = true")
-        set_clauses.append("u.isFormFilled = true")
-    if user_update.first_name is not None:
-        set_clauses.append("u.first_name = $first_name")
-        params["first_name"] = user_update.first_name
-    if user_update.last_name is not None:
-        set_clauses.append("u.last_name = $last_name")
-        params["last_name"] = user_update.last_name
-    if user_update.gender is not None:
-        set_clauses.append("u.gender = $gender")
-        params["gender"] = user_update.gender
-    if user_update.occupation is not None:
-        set_clauses.append("u.occupation = $occupation")
-        params["occupation"] = user_update.occupation
-    if user_update.dob is not None:
-        try:
-            dob_date = datetime.datetime.strptime(user_update.dob, '%m-%d-%Y').date()
-            set_clauses.append("u.dob = $dob")
-            params["dob"] = dob_date
-        except ValueError:
-            # Invalid date format, skip or handle
-            pass
-    if user_update.address is not None:
-        set_clauses.append("u.address = $address")
-        params["address"] = user_update.address
-    if user_update.city is not None:
-        set_clauses.append("u.city = $city")
-        params["city"] = user_update.city
-    if user_update.state is not None:
-        set_clauses.append("u.state = $state")
-        params["state"] = user_update.state
-    if user_update.aadhar_number is not None:
-        set_clauses.append("u.aadhar_number = $aadhar_number")
-        params["aadhar_number"] = user_update.aadhar_number
-    if user_update.pincode is not None:
-        set_clauses.append("u.pincode = $pincode")
-        params["pincode"] = user_update.pincode
-    if user_update.aadhar_front_image_url is not None:
-        set_clauses.append("u.aadhar_front_image_url = $aadhar_front_image_url")
-        params["aadhar_front_image_url"] = user_update.aadhar_front_image_url
-    if user_update.aadhar_back_image_url is not None:
-        set_clauses.append("u.aadhar_back_image_url = $aadhar_back_image_url")
-        params["aadhar_back_image_url"] = user_update.aadhar_back_image_url
-    if user_update.verified is not None:
-        set_clauses.append("u.verified = $verified")
-        params["verified"] = user_update.verified
-    # Custom fields
-    if user_update.custom_fields:
-        for key, value in user_update.custom_fields.items():
-            safe_key = key.replace(" ", "_").replace("-", "_")
-            set_clauses.append(f"u.{safe_key} = ${safe_key}")
-            params[safe_key] = value
+# Cypher queries, kept as fixed strings so each has one cached plan on the server
+CYPHER_CREATE_USER = (
+    "MERGE (u:User {mobile: $mobile}) "
+    "ON CREATE SET u.id = randomUUID(), u.first_name = $first_name, u.last_name = $last_name, u.refered_by_mobile = $refered_by_mobile, u.refered_by_name = $refered_by_name, u._created = true "
+    "WITH u, coalesce(u._created, false) AS created "
+    "REMOVE u._created "
+    "RETURN properties(u) AS user, created"
+)
+CYPHER_CREATE_USERS = (
+    "UNWIND $rows AS r "
+    "MERGE (u:User {mobile: r.mobile}) "
+    "ON CREATE SET u.id = randomUUID(), u.first_name = r.first_name, u.last_name = r.last_name, u.refered_by_mobile = r.refered_by_mobile, u.refered_by_name = r.refered_by_name, u._created = true "
+    "WITH u, coalesce(u._created, false) AS created "
+    "REMOVE u._created "
+    "RETURN u.id AS id, u.mobile AS mobile, created"
+)
+CYPHER_UPDATE_USER = "MATCH (u:User {mobile: $mobile}) SET u += $props RETURN properties(u) AS user"
+CYPHER_UPDATE_USER_BY_ID = "MATCH (u:User {id: $id}) SET u += $props RETURN properties(u) AS user"
+CYPHER_UPDATE_USER_BY = {"mobile": CYPHER_UPDATE_USER, "id": CYPHER_UPDATE_USER_BY_ID}
+CYPHER_USER_BY_MOBILE = "MATCH (u:User {mobile: $mobile}) RETURN properties(u) AS user"
+CYPHER_USER_BY_ID = "MATCH (u:User {id: $id}) RETURN properties(u) AS user"
+CYPHER_USER_BY = {"mobile": CYPHER_USER_BY_MOBILE, "id": CYPHER_USER_BY_ID}
+CYPHER_NEW_REFERRALS = (
+    "MATCH (u:User {verified: false}) WHERE u.id > $cursor "
+    "RETURN u.id AS id, u.mobile AS mobile, u.name AS name, u.verified AS verified ORDER BY id LIMIT $limit"
+)
+# Summary columns only: KYC data such as the aadhar image URLs stays on the detail endpoints
+CYPHER_EXISTING_CUSTOMERS = (
+    "MATCH (u:User {verified:true}) WHERE u.id > $cursor "
+    "RETURN u.id AS id, u.mobile AS mobile, u.name AS name, u.first_name AS first_name, u.last_name AS last_name, "
+    "u.email AS email, u.gender AS gender, u.occupation AS occupation, u.city AS city, u.state AS state, "
+    "u.pincode AS pincode, u.referral_type AS referral_type, u.refered_by_mobile AS refered_by_mobile, "
+    "u.refered_by_name AS refered_by_name, u.verified AS verified, u.isFormFilled AS isFormFilled "
+    "ORDER BY id LIMIT $limit"
+)
+CYPHER_PRODUCTS = "MATCH (p:PRODUCT:BUFFALO) RETURN properties(p) AS product"
+CYPHER_VERIFY_USER = (
+    "MATCH (u:User {mobile: $mobile}) "
+    "WITH u, u.referral_type AS type, u.verified AS verified, properties(u) AS user_props "
+    "FOREACH (_ IN CASE WHEN NOT coalesce(verified, false) AND type = 'new_referral' THEN [1] ELSE [] END | "
+    "SET u.device_id = $device_id, u.device_model = $device_model) "
+    "RETURN type, verified, user_props"
+)
+CYPHER_CREATE_PURCHASE = (
+    "MATCH (u:User {mobile: $User_mobile}) "
+    "CREATE (u)-[:PURCHASED {item: $item, details: $details}]->(p:Purchase {id: randomUUID()})"
+)
+# Rows per UNWIND statement for the batch endpoints
+UNWIND_BATCH_SIZE = 1000
+# Items per batch request, so one call can't hold an arbitrarily large write transaction
+MAX_BATCH_ITEMS = 10 * UNWIND_BATCH_SIZE
+CYPHER_CREATE_PURCHASES = (
+    "UNWIND $rows AS r "
+    "MATCH (u:User {mobile: r.User_mobile}) "
+    "CREATE (u)-[:PURCHASED {item: r.item, details: r.details}]->(p:Purchase {id: randomUUID()}) "
+    "RETURN count(p) AS recorded"
+)
+
+
+@app.on_event("startup")
+async def startup():
+    # One driver per process; it keeps a pool of Bolt connections that every request reuses
+    app.state.driver = AsyncGraphDatabase.driver(
+        URI,
+        auth=AUTH,
+        max_connection_pool_size=NEO4J_POOL_SIZE,
+        connection_acquisition_timeout=NEO4J_ACQ_TIMEOUT,
+        connection_timeout=5,
+        keep_alive=True,
+        max_connection_lifetime=3600,
+    )
+    await apply_user_schema()
+
+
+async def apply_user_schema():
+    """Create the User constraints and indexes and backfill missing ids, logging failures instead of failing boot.
+
+    Health checks and the dashboard pages don't need Neo4j, so an unreachable database or an existing
+    duplicate blocking a constraint must not crash-loop the instances. Each statement runs once in an
+    auto-commit transaction; managed retries would hold up boot for the full retry window.
+    """
+    async with app.state.driver.session() as session:
+        for statement in (*USER_SCHEMA, BACKFILL_USER_IDS):
+            try:
+                await consume(session, statement, {})
+            except ServiceUnavailable:
+                logger.exception("Neo4j unreachable at startup; User schema not applied")
+                return
+            except Exception:
+                logger.exception("Could not apply User schema statement: %s", statement)
 
-    return set_clauses, params
 
-def get_driver():
-    return GraphDatabase.driver(URI, auth=AUTH)
+@app.on_event("shutdown")
+async def shutdown():
+    await app.state.driver.close()
+
+
+# Transaction functions for session.execute_read / execute_write, which retry them on transient errors
+async def consume(tx, query: str, params: dict):
+    result = await tx.run(query, params)
+    return await result.consume()
+
+async def fetch_single(tx, query: str, params: dict):
+    result = await tx.run(query, params)
+    return await result.single()
+
+async def fetch_all(tx, query: str, params: dict):
+    result = await tx.run(query, params)
+    return [record async for record in result]
+
+async def fetch_all_batched(tx, query: str, rows: list):
+    """Run an `UNWIND $rows` query over `rows` in UNWIND_BATCH_SIZE slices within one transaction."""
+    records = []
+    for start in range(0, len(rows), UNWIND_BATCH_SIZE):
+        records += await fetch_all(tx, query, {"rows": rows[start:start + UNWIND_BATCH_SIZE]})
+    return records
+
+
+async def list_users(query: str, params: dict) -> dict:
+    """Return one page of a user list query in the success envelope.
+
+    `next_cursor` is the last user id when the page is full, and null on the last page.
+    """
+    async with app.state.driver.session() as session:
+        records = await session.execute_read(fetch_all, query, params)
+    # The list queries project exactly the response columns, so each record is a user as-is
+    users = [record.data() for record in records]
+    # `u.id > $cursor` only matches non-null ids, so the last user always carries a usable cursor
+    next_cursor = users[-1]["id"] if len(users) == params["limit"] else None
+    return {"statuscode": 200, "status": "success", "users": users, "next_cursor": next_cursor}
 
 
 class UserCreate(BaseModel):
@@ -157,6 +307,9 @@ class UserCreate(BaseModel):
     refered_by_name: Optional[str] = None
 
 class UserUpdate(BaseModel):
+    # Unknown keys are dropped; arbitrary properties go through custom_fields
+    model_config = {"extra": "ignore"}
+
     name: Optional[str] = None
     referral_type: Optional[str] = None
     verified: Optional[bool] = None
@@ -187,215 +340,184 @@ class Purchase(BaseModel):
     item: str  # e.g., 'buffalo'
     details: str
 
+class UserBatch(BaseModel):
+    users: List[UserCreate] = Field(max_length=MAX_BATCH_ITEMS)
+
+class PurchaseBatch(BaseModel):
+    purchases: List[Purchase] = Field(max_length=MAX_BATCH_ITEMS)
+
+
+# dob is stored as a date and returned as dd-mm-yyyy; dispatch on the exact type
+DOB_FORMATTERS = {
+    datetime.date: lambda d: d.strftime('%d-%m-%Y'),
+    Date: lambda d: f"{d.day:02d}-{d.month:02d}-{d.year}",
+}
+
+def format_dob(dob):
+    formatter = DOB_FORMATTERS.get(type(dob))
+    return formatter(dob) if formatter else dob
+
+# Custom field keys become property names: spaces and dashes map to underscores
+CUSTOM_FIELD_KEY_TRANS = str.maketrans(" -", "__")
+# ...but never ones that would rewrite a user's identity or bypass a declared (validated or derived) field
+RESERVED_CUSTOM_FIELD_KEYS = frozenset({"id", "mobile", "isFormFilled", *UserUpdate.model_fields})
+
+# Returned as-is by the update endpoints for PUTs that carry nothing to set, without a Neo4j round-trip
+NO_FIELDS_TO_UPDATE = {"statuscode": 200, "status": "success", "message": "No fields to update", "updated_fields": 0}
+
+
+def build_update_props(user_update: UserUpdate) -> dict:
+    """Flatten the provided fields into a single property map for `SET u += $props`."""
+    props = user_update.model_dump(exclude_unset=True, exclude_none=True, exclude={"dob", "custom_fields"})
+
+    # Submitting an email completes the profile form; an explicit `verified` still wins
+    if "email" in props:
+        props.setdefault("verified", True)
+        props["isFormFilled"] = True
+    if user_update.dob is not None:
+        try:
+            props["dob"] = datetime.datetime.strptime(user_update.dob, '%m-%d-%Y').date()
+        except ValueError:
+            # Invalid date format, skip or handle
+            pass
+    # Custom fields; reserved keys are dropped, as a custom `mobile` was a no-op before
+    if user_update.custom_fields:
+        for key, value in user_update.custom_fields.items():
+            key = key.translate(CUSTOM_FIELD_KEY_TRANS)
+            if key not in RESERVED_CUSTOM_FIELD_KEYS:
+                props[key] = value
+
+    return props
+
 
 @app.post("/users/")
 async def create_User(User: UserCreate):
     try:
-        driver = get_driver()
-        try:
-            with driver.session() as session:
-                # Check if user already exists
-                existing = session.run(
-                    "MATCH (u:User {mobile: $mobile}) RETURN u",
-                    mobile=User.mobile
-                ).single()
-
-                if existing:
-                    existing_props = dict(existing["u"])
-                    return {
-                        "statuscode": 200,
-                        "status": "success",
-                        "message": "User already exists",
-                        "user": existing_props
-                    }
-
-                # Create or update user, assigning a stable unique id on first creation
-                result = session.run(
-                    "MERGE (u:User {mobile: $mobile}) "
-                    "ON CREATE SET u.id = randomUUID() "
-                    "SET u.first_name = $first_name,u.last_name = $last_name,u.mobile = $mobile,u.refered_by_mobile = $refered_by_mobile,u.refered_by_name = $refered_by_name "
-                    "RETURN u.id AS id, u.mobile AS mobile, u.first_name AS first_name, u.last_name AS last_name,u.refered_by_mobile AS refered_by_mobile,u.refered_by_name AS refered_by_name",
-                    mobile=User.mobile,
-                    first_name=User.first_name,
-                    last_name=User.last_name,
-                    refered_by_mobile=User.refered_by_mobile,
-                    refered_by_name=User.refered_by_name
-                )
-                record = result.single()
+        async with app.state.driver.session() as session:
+            # Create the user with a stable unique id, or return the existing one untouched
+            record = await session.execute_write(fetch_single, CYPHER_CREATE_USER, User.model_dump())
+            user_props = record["user"]
+
+            if not record["created"]:
+                if 'dob' in user_props:
+                    user_props['dob'] = format_dob(user_props['dob'])
                 return {
-                    "statuscode": 201,
+                    "statuscode": 200,
                     "status": "success",
-                    "message": "User created or updated",
-                    "user": {
-                        "id": record["id"],
-                        "mobile": record["mobile"],
-                        "first_name": record["first_name"],
-                        "last_name": record["last_name"],
-                        "refered_by_mobile": record["refered_by_mobile"],
-                        "refered_by_name": record["refered_by_name"],
-                    },
+                    "message": "User already exists",
+                    "user": user_props
                 }
-        finally:
-            driver.close()
+
+            return {
+                "statuscode": 201,
+                "status": "success",
+                "message": "User created or updated",
+                "user": {
+                    "id": user_props["id"],
+                    "mobile": user_props["mobile"],
+                    "first_name": user_props["first_name"],
+                    "last_name": user_props["last_name"],
+                    "refered_by_mobile": user_props["refered_by_mobile"],
+                    "refered_by_name": user_props.get("refered_by_name"),
+                },
+            }
     except Exception as e:
-        return {"statuscode": 500, "status": "error", "message": str(e)}
+        raise HTTPException(status_code=500, detail=str(e)) from e
 
-@app.put("/users/{mobile}")
-async def update_user(mobile: str, user_update: UserUpdate):
+@app.post("/users/batch")
+async def create_users(batch: UserBatch):
+    """Create many users in one transaction; like POST /users/, existing mobiles are left untouched."""
+    if not batch.users:
+        return {"statuscode": 200, "status": "success", "message": "Users processed", "created": 0, "users": []}
     try:
-        driver = get_driver()
-        try:
-            with driver.session() as session:
-                # Check if user exists
-                result = session.run("MATCH (u:User {mobile: $mobile}) RETURN u", mobile=mobile)
-                user = result.single()
-                
-                if not user:
-                    return {"statuscode": 404, "status": "error", "message": "User not found"}
-                
-                set_clauses, params = build_update_clauses(user_update)
-                params["mobile"] = mobile
-                
-                if set_clauses:
-                    query = f"MATCH (u:User {{mobile: $mobile}}) SET {', '.join(set_clauses)} RETURN u"
-                    result = session.run(query, **params)
-                    updated = result.single()["u"] if result.single() else None
-                    updated_data = dict(updated) if updated is not None else None
-                else:
-                    updated_data = None
-               
-                return {"statuscode": 200, "status": "success", "message": "User updated successfully", "updated_fields": len(set_clauses), "user": updated_data}
-        finally:
-            driver.close()
+        async with app.state.driver.session() as session:
+            records = await session.execute_write(
+                fetch_all_batched, CYPHER_CREATE_USERS, [user.model_dump() for user in batch.users]
+            )
+        return {
+            "statuscode": 200,
+            "status": "success",
+            "message": "Users processed",
+            "created": sum(1 for record in records if record["created"]),
+            "users": [record.data() for record in records],
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+async def update_user_by(key: str, value: str, user_update: UserUpdate):
+    """Apply a user update by `mobile` or `id`; both update endpoints share this single code path."""
+    props = build_update_props(user_update)
+    if not props:
+        return NO_FIELDS_TO_UPDATE
+    try:
+        async with app.state.driver.session() as session:
+            # A missing user simply matches nothing, so no separate existence check is needed
+            record = await session.execute_write(fetch_single, CYPHER_UPDATE_USER_BY[key], {key: value, "props": props})
     except Exception as e:
-        return {"statuscode": 500, "status": "error", "message": str(e)}
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    if not record:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    updated_data = record["user"]
+    if 'dob' in updated_data:
+        updated_data['dob'] = format_dob(updated_data['dob'])
+
+    return {"statuscode": 200, "status": "success", "message": "User updated successfully", "updated_fields": len(props), "user": updated_data}
+
+
+@app.put("/users/{mobile}")
+async def update_user(mobile: str, user_update: UserUpdate):
+    return await update_user_by("mobile", mobile, user_update)
 
 
 @app.put("/users/id/{user_id}")
 async def update_user_by_id(user_id: str, user_update: UserUpdate):
-    try:
-        driver = get_driver()
-        try:
-            with driver.session() as session:
-                result = session.run("MATCH (u:User {id: $id}) RETURN u", id=user_id)
-                user = result.single()
-
-                if not user:
-                    return {"statuscode": 404, "status": "error", "message": "User not found"}
-
-                set_clauses, params = build_update_clauses(user_update)
-                params["id"] = user_id
-
-                if set_clauses:
-                    query = f"MATCH (u:User {{id: $id}}) SET {', '.join(set_clauses)} RETURN u"
-                    result = session.run(query, **params)
-                    record = result.single()
-                    updated = record["u"] if record else None
-                    updated_data = dict(updated) if updated is not None else None
-                    # Convert dob to dd-mm-yyyy string if present
-                    if updated_data and 'dob' in updated_data:
-                       dob = updated_data['dob']
-                       if isinstance(dob, datetime.date):
-                            updated_data['dob'] = dob.strftime('%d-%m-%Y')
-                       elif isinstance(dob, Date):
-                            updated_data['dob'] = f"{dob.day:02d}-{dob.month:02d}-{dob.year}"
-                else:
-                    updated_data = None
-
-                return {"statuscode": 200, "status": "success", "message": "User updated successfully", "updated_fields": len(set_clauses), "user": updated_data}
-        finally:
-            driver.close()
-    except Exception as e:
-        return {"statuscode": 500, "status": "error", "message": str(e)}
+    return await update_user_by("id", user_id, user_update)
 
 @app.get("/users/referrals")
-async def get_new_referrals():
+async def get_new_referrals(limit: int = Query(100, ge=1, le=1000), cursor: str = ""):
     try:
-        driver = get_driver()
-        try:
-            with driver.session() as session:
-                result = session.run("MATCH (u:User {verified: false}) RETURN u.id, u.mobile, u.name, u.verified")
-                Users = [
-                    {
-                        "id": record["u.id"],
-                        "mobile": record["u.mobile"],
-                        "name": record["u.name"],
-                        "verified": record["u.verified"],
-                    }
-                    for record in result
-                ]
-            return {"statuscode": 200, "status": "success", "users": Users}
-        finally:
-            driver.close()
+        return await list_users(CYPHER_NEW_REFERRALS, {"cursor": cursor, "limit": limit})
     except Exception as e:
-        return {"statuscode": 500, "status": "error", "message": str(e)}
+        raise HTTPException(status_code=500, detail=str(e)) from e
 
 
 @app.get("/users/customers")
-async def get_existing_customers():
+async def get_existing_customers(limit: int = Query(100, ge=1, le=1000), cursor: str = ""):
     try:
-        driver = get_driver()
-        try:
-            with driver.session() as session:
-                result = session.run("MATCH (u:User {verified:true}) RETURN u")
-                Users = [dict(record["u"]) for record in result]
-            return {"statuscode": 200, "status": "success", "users": Users}
-        finally:
-            driver.close()
+        return await list_users(CYPHER_EXISTING_CUSTOMERS, {"cursor": cursor, "limit": limit})
     except Exception as e:
-        return {"statuscode": 500, "status": "error", "message": str(e)}
+        raise HTTPException(status_code=500, detail=str(e)) from e
 
 
-@app.get("/users/{mobile}")
-async def get_user_details(mobile: str):
+async def get_user_by(key: str, value: str):
+    """Look a user up by `mobile` or `id`; both detail endpoints share this single code path."""
     try:
-        driver = get_driver()
-        try:
-            with driver.session() as session:
-                result = session.run("MATCH (u:User {mobile: $mobile}) RETURN u", mobile=mobile)
-                user_record = result.single()
-                
-                if not user_record:
-                    return {"statuscode": 404, "status": "error", "message": "User not found"}
-                
-                user_node = user_record["u"]
-                user_data = dict(user_node)
-                
-                return {"statuscode": 200, "status": "success", "user": user_data}
-        finally:
-            driver.close()
+        async with app.state.driver.session() as session:
+            user_record = await session.execute_read(fetch_single, CYPHER_USER_BY[key], {key: value})
     except Exception as e:
-        return {"statuscode": 500, "status": "error", "message": str(e)}
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    if not user_record:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    user_data = user_record["user"]
+    if 'dob' in user_data:
+        user_data['dob'] = format_dob(user_data['dob'])
+
+    return {"statuscode": 200, "status": "success", "user": user_data}
+
+
+@app.get("/users/{mobile}")
+async def get_user_details(mobile: str):
+    return await get_user_by("mobile", mobile)
 
 
 @app.get("/users/id/{user_id}")
 async def get_user_details_by_id(user_id: str):
     """Fetch full user details using generated unique id instead of mobile."""
-    try:
-        driver = get_driver()
-        try:
-            with driver.session() as session:
-                result = session.run("MATCH (u:User {id: $id}) RETURN u", id=user_id)
-                user_record = result.single()
-
-                if not user_record:
-                    return {"statuscode": 404, "status": "error", "message": "User not found"}
-
-                user_node = user_record["u"]
-                user_data = dict(user_node)
-                # Convert dob to dd-mm-yyyy string if present
-                if 'dob' in user_data:
-                    dob = user_data['dob']
-                    if isinstance(dob, datetime.date):
-                        user_data['dob'] = dob.strftime('%d-%m-%Y')
-                    elif isinstance(dob, Date):
-                        user_data['dob'] = f"{dob.day:02d}-{dob.month:02d}-{dob.year}"
-
-                return {"statuscode": 200, "status": "success", "user": user_data}
-        finally:
-            driver.close()
-    except Exception as e:
-        return {"statuscode": 500, "status": "error", "message": str(e)}
+    return await get_user_by("id", user_id)
 
 
 @app.get("/products/{product_id}")
@@ -432,79 +554,76 @@ async def get_product_details(product_id: str):
 async def get_products():
     """Return all buffalo products stored in Neo4j as PRODUCT:BUFFALO nodes."""
     try:
-        driver = get_driver()
-        try:
-            with driver.session() as session:
-                result = session.run("MATCH (p:PRODUCT:BUFFALO) RETURN p")
-                products = [dict(record["p"]) for record in result]
-            return {"statuscode": 200, "status": "success", "products": products}
-        finally:
-            driver.close()
+        async with app.state.driver.session() as session:
+            records = await session.execute_read(fetch_all, CYPHER_PRODUCTS, {})
+            products = [record["product"] for record in records]
+        return {"statuscode": 200, "status": "success", "products": products}
     except Exception as e:
-        return {"statuscode": 500, "status": "error", "message": str(e)}
+        raise HTTPException(status_code=500, detail=str(e)) from e
 
 
 @app.post("/users/verify")
 async def verify_user(user: UserVerify):
     try:
-        driver = get_driver()
-        try:
-            with driver.session() as session:
-                # Check if user exists and is new_referral and not verified
-                result = session.run(
-                    "MATCH (u:User {mobile: $mobile}) RETURN u.referral_type AS type, u.verified AS verified, properties(u) AS user_props",
-                    mobile=user.mobile
-                )
-                record = result.single()
-                if not record:
-                    return {"statuscode": 300, "status": "error", "message": "User not found"}
-                if record["verified"]:
-                    user_props = dict(record["user_props"])
-                    # Convert dob to dd-mm-yyyy string if present
-                    if 'dob' in user_props:
-                        dob = user_props['dob']
-                        if isinstance(dob, datetime.date):
-                            user_props['dob'] = dob.strftime('%d-%m-%Y')
-                        elif isinstance(dob, Date):
-                            user_props['dob'] = f"{dob.day:02d}-{dob.month:02d}-{dob.year}"
-                    return {"statuscode": 200, "status": "success", "message": "User already verified", "user": user_props}
-                elif record and record["type"] == "new_referral":
-                    # Generate OTP
-                    otp = str(random.randint(100000, 999999))
-                    # Update with device info and verified
-                    session.run(
-                        "MATCH (u:User {mobile: $mobile}) SET u.device_id = $device_id, u.device_model = $device_model",
-                        mobile=user.mobile, device_id=user.device_id, device_model=user.device_model
-                    )
-                    user_props = dict(record["user_props"])
-                    # Convert dob to dd-mm-yyyy string if present
-                    if 'dob' in user_props:
-                        dob = user_props['dob']
-                        if isinstance(dob, datetime.date):
-                            user_props['dob'] = dob.strftime('%d-%m-%Y')
-                        elif isinstance(dob, Date):
-                            user_props['dob'] = f"{dob.day:02d}-{dob.month:02d}-{dob.year}"
-                    return {"statuscode": 200, "status": "success", "message": "New user verified", "otp": otp, "user": user_props}
-                else:
-                    return {"statuscode": 300, "status": "error", "message": "User not a new referral"}
-        finally:
-            driver.close()
+        async with app.state.driver.session() as session:
+            # Fetch the user and, if it is an unverified new_referral, record the device in the same query
+            record = await session.execute_write(fetch_single, CYPHER_VERIFY_USER, {
+                "mobile": user.mobile, "device_id": user.device_id, "device_model": user.device_model
+            })
     except Exception as e:
-        return {"statuscode": 500, "status": "error", "message": str(e)}
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    if not record:
+        raise HTTPException(status_code=404, detail="User not found")
+    if record["verified"]:
+        user_props = record["user_props"]
+        if 'dob' in user_props:
+            user_props['dob'] = format_dob(user_props['dob'])
+        return {"statuscode": 200, "status": "success", "message": "User already verified", "user": user_props}
+    elif record["type"] == "new_referral":
+        # Generate OTP
+        otp = f"{secrets.randbelow(900000) + 100000:06d}"
+        user_props = record["user_props"]
+        if 'dob' in user_props:
+            user_props['dob'] = format_dob(user_props['dob'])
+        return {"statuscode": 200, "status": "success", "message": "New user verified", "otp": otp, "user": user_props}
+    else:
+        raise HTTPException(status_code=400, detail="User not a new referral")
 
 @app.post("/purchases/")
 async def create_purchase(purchase: Purchase):
     try:
-        driver = get_driver()
-        try:
-            with driver.session() as session:
-                session.run(
-                    "MATCH (u:User {mobile: $User_mobile}) "
-                    "CREATE (u)-[:PURCHASED {item: $item, details: $details}]->(p:Purchase {id: randomUUID()})",
-                    User_mobile=purchase.User_mobile, item=purchase.item, details=purchase.details
-                )
-            return {"statuscode": 200, "status": "success", "message": "Purchase recorded"}
-        finally:
-            driver.close()
+        async with app.state.driver.session() as session:
+            await session.execute_write(consume, CYPHER_CREATE_PURCHASE, purchase.model_dump())
+        return {"statuscode": 200, "status": "success", "message": "Purchase recorded"}
     except Exception as e:
-        return {"statuscode": 500, "status": "error", "message": str(e)}
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@app.post("/purchases/batch")
+async def create_purchases(batch: PurchaseBatch):
+    """Record many purchases with one UNWIND statement instead of one request per purchase."""
+    if not batch.purchases:
+        return {"statuscode": 200, "status": "success", "message": "Purchases recorded", "recorded": 0}
+    try:
+        async with app.state.driver.session() as session:
+            records = await session.execute_write(
+                fetch_all_batched, CYPHER_CREATE_PURCHASES, [purchase.model_dump() for purchase in batch.purchases]
+            )
+        return {"statuscode": 200, "status": "success", "message": "Purchases recorded", "recorded": sum(record["recorded"] for record in records)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # `python main.py` from backend/; the Docker images run gunicorn with uvicorn workers instead
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=int(os.getenv("PORT", "8000")),
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "4")),
+    )